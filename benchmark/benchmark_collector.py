@@ -1,10 +1,24 @@
 ## Quick code to collect all benchmark information
 
-import glob
 import os
+import numpy as np
 import pandas as pd
-import re
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _read_s(path, delim):
+    """
+    Read the ``s`` (seconds) column of a benchmark file. These files are just a header and a single row, so we split
+    the two lines ourselves instead of going through pandas
+    :params path: path of the .benchmark file
+    :params delim: delimiter used in the benchmark file
+    :return: Value of the ``s`` column as a float
+    """
+    with open(path) as f:
+        header = f.readline().rstrip('\n').split(delim)
+        row = f.readline().rstrip('\n').split(delim)
+    return float(row[header.index('s')])
 
 
 def extract_information(sample, path=''):
@@ -17,20 +31,14 @@ def extract_information(sample, path=''):
     
     benchmark_dict = {}
 
-    list_files_fastqc = os.listdir(path+'fastqc_out/')
-    list_benchmark = [i for i in list_files_fastqc if re.search('.benchmark$', i)]
-
-    value = 0
-    for i in list_benchmark:
-            
-        df = pd.read_csv(path+'fastqc_out/'+i, delimiter=' ')
-        value += df.s.values[0]
+    with os.scandir(path+'fastqc_out/') as entries:
+        value = np.fromiter((_read_s(entry.path, ' ') for entry in entries if entry.name.endswith('.benchmark')),
+                            dtype=np.float64).sum()
 
     value_seqtk = 0
     for i in os.listdir(path+'OUTPUT3/'+sample+'/seqtk/'):
 
-        df = pd.read_csv(path+'OUTPUT3/'+sample+'/seqtk/'+i, delimiter=' ')
-        value_seqtk += df.s.values[0]
+        value_seqtk += _read_s(path+'OUTPUT3/'+sample+'/seqtk/'+i, ' ')
 
     ## Fastqc
     benchmark_dict['fastqc'] = round(value/60, 2)
@@ -39,42 +47,45 @@ def extract_information(sample, path=''):
     benchmark_dict['Seqtk'] = round(value_seqtk/60, 2) 
 
     ## Bwa
-    benchmark_dict['Bwa'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/bwa/'+sample+'.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['Bwa'] = round(_read_s(path+'OUTPUT3/'+sample+'/bwa/'+sample+'.benchmark', ' ')/60, 2)
 
     ## SamBlaster
-    benchmark_dict['SamBlaster'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_samblaster.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['SamBlaster'] = round(_read_s(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_samblaster.benchmark', ' ')/60, 2)
 
     ## SamSort
-    benchmark_dict['SamSort'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_sort_nodup.sam.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['SamSort'] = round(_read_s(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_sort_nodup.sam.benchmark', ' ')/60, 2)
 
     ## SamIndex
-    benchmark_dict['SamIndex'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_sort_nodup.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['SamIndex'] = round(_read_s(path+'OUTPUT3/'+sample+'/bwa/'+sample+'_sort_nodup.benchmark', ' ')/60, 2)
 
     ## BaseRecalibrator
-    benchmark_dict['BaseRecalibrator'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/gatk_bsr/'+sample+'_sort_nodup.recaldat.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['BaseRecalibrator'] = round(_read_s(path+'OUTPUT3/'+sample+'/gatk_bsr/'+sample+'_sort_nodup.recaldat.benchmark', ' ')/60, 2)
 
     ## ApplyBQSR
-    benchmark_dict['ApplyBQSR'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/gatk_bsr/'+sample+'_sort_nodup.bqsr.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['ApplyBQSR'] = round(_read_s(path+'OUTPUT3/'+sample+'/gatk_bsr/'+sample+'_sort_nodup.bqsr.benchmark', ' ')/60, 2)
 
     ## HaplotypeCaller
-    benchmark_dict['HaploType'] = round(pd.read_csv(path+'OUTPUT3/'+sample+'/gatk_gvcf/'+sample+'_sort_nodup.g.vcf.benchmark', delimiter=' ').s.values[0]/60, 2)
+    benchmark_dict['HaploType'] = round(_read_s(path+'OUTPUT3/'+sample+'/gatk_gvcf/'+sample+'_sort_nodup.g.vcf.benchmark', ' ')/60, 2)
             
     return benchmark_dict
 
 
-def extract_info_list(id_, sample, path):
+def extract_info_list(id_, sample, path, size_bytes=None):
+    """
+    Function to extract the benchmark information of a sample as a row of the final table
+    :params id_: identifier of the sample (center||study||sample)
+    :params sample: name of the sample as found in the .gz files
+    :params path: directory of the sample
+    :params size_bytes: total size of the .gz files of the sample. If None the directory is scanned to compute it
+    :return: List with the id, the **minutes** of each rule and the size of the sample in GB
+    """
 
     l = []
     deli = '\t'
 
-    list_files_fastqc = os.listdir(path+'fastqc/')
-    list_benchmark = [i for i in list_files_fastqc if re.search('.benchmark$', i)]
-
-    value = 0
-    for i in list_benchmark:
-
-        df = pd.read_csv(path+'fastqc/'+i, delimiter=deli)
-        value += df.s.values[0]
+    with os.scandir(path+'fastqc/') as entries:
+        value = np.fromiter((_read_s(entry.path, deli) for entry in entries if entry.name.endswith('.benchmark')),
+                            dtype=np.float64).sum()
 
     # ID
     l.append(id_)
@@ -82,46 +93,24 @@ def extract_info_list(id_, sample, path):
     ## Fastqc
     l.append(round(value/60, 2))
 
-    ## Bwa
-    try:
-        l.append(round(pd.read_csv(path+'bwa/'+sample+'.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
-
-    ## SamBlaster
-    try:
-        l.append(round(pd.read_csv(path+'bwa/'+sample+'_samblaster.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
-
-    ## SamSort
-    try:
-        l.append(round(pd.read_csv(path+'bwa/'+sample+'_sort_nodup.sam.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
-
-    ## BaseRecalibrator
-    try:
-        l.append(round(pd.read_csv(path+'gatk_bsr/'+sample+'_sort_nodup.recaldat.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
-
-    ## ApplyBQSR
-    try:
-        l.append(round(pd.read_csv(path+'gatk_bsr/'+sample+'_sort_nodup.bqsr.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
-
-    ## Haplotype
-    try:
-        l.append(round(pd.read_csv(path+'gatk_gvcf/tmp_'+sample+'_sort_nodup.g.vcf.benchmark', delimiter=deli).s.values[0]/60, 2))
-    except FileNotFoundError as e:
-        l.append(0)
+    ## Bwa, SamBlaster, SamSort, BaseRecalibrator, ApplyBQSR and Haplotype (0 when the rule did not run)
+    paths = (path+'bwa/'+sample+'.benchmark',
+             path+'bwa/'+sample+'_samblaster.benchmark',
+             path+'bwa/'+sample+'_sort_nodup.sam.benchmark',
+             path+'gatk_bsr/'+sample+'_sort_nodup.recaldat.benchmark',
+             path+'gatk_bsr/'+sample+'_sort_nodup.bqsr.benchmark',
+             path+'gatk_gvcf/tmp_'+sample+'_sort_nodup.g.vcf.benchmark')
+    for benchmark in paths:
+        try:
+            l.append(round(_read_s(benchmark, deli)/60, 2))
+        except FileNotFoundError:
+            l.append(0)
 
     ## File size
-    size = round(os.path.getsize(path + sample + '_R1.fastq.gz')*1e-9, 2)
-    size += round(os.path.getsize(path + sample + '_R1.fastq.gz')*1e-9, 2)
-    l.append(size)
+    if size_bytes is None:
+        with os.scandir(path) as entries:
+            size_bytes = sum(entry.stat().st_size for entry in entries if entry.name.endswith('.gz'))
+    l.append(round(size_bytes*1e-9, 2))
 
     return l
 
@@ -139,44 +128,64 @@ if __name__ == "__main__":
                'eaabd6f1-1b34-4196-882c-198465045d71']
 
 
-    data = [['id', 'fastqc', 'bwa', 'samblaster', 'samsort', 'base', 'apply', 'haplo', 'size (GB)', 'total time (min)']]
+    # Column oriented storage, each row returned by extract_info_list is spread over the columns
+    data = {k: [] for k in ('id', 'fastqc', 'bwa', 'samblaster', 'samsort', 'base', 'apply', 'haplo', 'size (GB)')}
 
+    # (id, sample, path, size in bytes) of every sample found in the centers
+    tasks = []
     for center in centers:
-        for study in os.listdir(path + '/' + center + '/'):
-            for sample in os.listdir(path + '/' + center + '/' + study + '/'):
-                path_parent = path + '/' + center + '/' + study + '/' + sample + '/'
-                try:
-                    samples = [os.path.basename(x) for x in glob.glob(path_parent + '/*.gz')][0]
-                    samples = samples[:-12]
-                except IndexError as e:
-                    print('Cannot find .gz files for this sample')
-                    continue
-
-                tmp = extract_info_list(id_=center + '||' + study + '||' + sample, sample = samples, path = path_parent)
-                tmp.append(sum(tmp[1:8]))
-                data.append(tmp)
+        with os.scandir(path + '/' + center + '/') as studies:
+            for study in studies:
+                with os.scandir(study.path) as sample_dirs:
+                    for sample in sample_dirs:
+                        path_parent = sample.path + '/'
+                        # DirEntry caches its stat result, so the sizes come for free from the scan
+                        with os.scandir(path_parent) as entries:
+                            gz_files = [entry for entry in entries if entry.name.endswith('.gz')]
+                        if not gz_files:
+                            print('Cannot find .gz files for this sample')
+                            continue
+                        samples = gz_files[0].name[:-12]
+                        size_bytes = sum(entry.stat().st_size for entry in gz_files)
+
+                        tasks.append((center + '||' + study.name + '||' + sample.name, samples, path_parent,
+                                      size_bytes))
+
+    # Each sample only reads a handful of tiny files, so the extraction is I/O bound and threads overlap the latency
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        rows = list(executor.map(lambda task: extract_info_list(*task), tasks))
+
+    for tmp in rows:
+        for key, value in zip(data, tmp):
+            data[key].append(value)
 
 
     print('FINISHED')
     print('==================================')
     print('==================================')
     print('==================================')
-    df = pd.DataFrame(data[1:], columns=data[0])
-    bins = [0, 5, 10, 15, 20, 25]
-    bins1 = [i for i in range(25)]
-    df['size_bin'] = pd.cut(df['size (GB)'], bins)
-    df['size_bin_small'] = pd.cut(df['size (GB)'], bins1)   
-    
-    x = df.groupby(['size_bin'])['total time (min)'].mean()
+    df = pd.DataFrame(data).astype({key: 'float64' for key in list(data)[1:]})
+    df['total time (min)'] = df[['fastqc', 'bwa', 'samblaster', 'samsort', 'base', 'apply', 'haplo']].sum(axis=1)
+    bins = np.array([0, 5, 10, 15, 20, 25])
+    bins1 = np.arange(25)
+    # Integer bucket codes: code i stands for the interval (bins[i-1], bins[i]], as pd.cut would build it. Codes 0
+    # and len(bins) fall outside the bins
+    df['size_bin'] = np.digitize(df['size (GB)'].to_numpy(), bins, right=True)
+    size_code_small = np.digitize(df['size (GB)'].to_numpy(), bins1, right=True)
+    df['size_bin_small'] = size_code_small
+    labels = {i: '(%d, %d]' % (bins[i - 1], bins[i]) for i in range(1, len(bins))}
+    labels_small = {i: '(%d, %d]' % (bins1[i - 1], bins1[i]) for i in range(1, len(bins1))}
+
+    x = df.groupby(['size_bin'])['total time (min)'].mean().reindex(list(labels)).rename(index=labels)
     plot = x.plot(kind='bar', xlabel='Size Bucket', ylabel='Processing Time (min)', title='Computational Processing \n Benchmark')
     fig = plot.get_figure()
     fig.savefig("output.png", bbox_inches='tight')
     # df.to_csv('res.csv')
-    df1 = df[(df.size_bin_small == pd.Interval(5, 6, closed='right')) | 
-             (df.size_bin_small == pd.Interval(10, 11, closed='right')) | 
-             (df.size_bin_small == pd.Interval(22, 23, closed='right'))]
+    # Buckets (5, 6], (10, 11] and (22, 23]
+    df1 = df.iloc[np.isin(size_code_small, np.array([6, 11, 23]))]
     print(df1.head())
     x = df1.groupby(['size_bin_small'])[['fastqc', 'bwa', 'samsort', 'base', 'apply', 'haplo']].mean().dropna()
+    x = x.rename(index=labels_small)
     print(x)
     plot = x.T.plot(kind='bar')
     fig = plot.get_figure()
@@ -1,5 +1,9 @@
-from .log_analysis_new import Parent
-import re
+from .log_analysis_new import Parent, GC_SPACES, starts_with_date, failed_conditions, \
+    unexpected_rows, ENGINE_ROWS
+
+# Input files the features have to be extracted from
+_FEATURE_FILES = ['hg38_resources/wgs_calling_regions.hg38.interval_list']
+
 
 class ApplyBQSR(Parent):
     """
@@ -40,20 +44,20 @@ class ApplyBQSR(Parent):
         progressmeter_bool = False
 
         for row in self.log_file:
-            if row[:-1] == '[Global flags]':
+            if row == '[Global flags]\n':
                 global_flags_bool = True
                 continue
 
-            if bool(re.search(r'(\d+-\d+-\d+)', row[:10])):
+            if starts_with_date(row):
                 global_flags_bool = False
 
-            if bool(re.search(r'INFO  ApplyBQSR', row)):
+            if 'INFO  ApplyBQSR' in row:
                 applybqsr_bool = True
 
-            if bool(re.search(r'INFO  ProgressMeter', row)):
+            if 'INFO  ProgressMeter' in row:
                 progressmeter_bool = True
 
-            if bool(re.search(r'INFO  FeatureManager', row)):
+            if 'INFO  FeatureManager' in row:
                 featuremanager_bool = True
 
             if global_flags_bool:
@@ -164,8 +168,8 @@ class ApplyBQSR(Parent):
         - ``ParOldGen``
         - ``Metaspace``
         """
-        s = ''.join(self.final_section[1:])
-        if len(re.findall(r"\bPSYoungGen\b|\bParOldGen\b|\bMetaspace\b", s)) != 3:
+        rows = self.final_section[1:]
+        if not all(any(i in row for row in rows) for i in GC_SPACES):
             raise Exception('check_final_section_others: ' + self.sample + ' not all the expected fields are present '
                                                                            'in the last part of the log')
 
@@ -175,12 +179,7 @@ class ApplyBQSR(Parent):
 
         - ``hg38_resources/wgs_calling_regions.hg38.interval_list``
         """
-
-        list_ = ['hg38_resources/wgs_calling_regions.hg38.interval_list']
-
-        s_check = ''.join(['\\' + 'b' + i + '\\' + 'b|' for i in list_])[:-1]
-        s = ''.join(self.featuremanager)
-        if len(re.findall(s_check, s)) != len(list_):
+        if not all(any(i in row for row in self.featuremanager) for i in _FEATURE_FILES):
             raise Exception('check_featuremanager_files: ' + self.sample + ' did not get the features from the correct '
                                                                            'input files')
 
@@ -193,12 +192,10 @@ class ApplyBQSR(Parent):
         - ``Done initializing engine``
         - ``Shutting down engine``
         """
-        t1 = self.applybqsr[19][-20:-1] != 'Initializing engine'
-        t2 = self.applybqsr[20][-25:-1] != 'Done initializing engine'
-        t3 = self.applybqsr[-1][-21:-1] != 'Shutting down engine'
+        failed = unexpected_rows(self.applybqsr, ENGINE_ROWS)
 
-        if t1 | t2 | t3:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3']))
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_applybqsr_engine: ' + self.sample + ' applybqsr engine did not work '
                                                                               'properly. Issue in condition/s: ', error)
 
@@ -206,7 +203,7 @@ class ApplyBQSR(Parent):
         """
         Method to check that the applybqsr engine generates the report well and that the quantization passes
         """
-        t1 = self.applybqsr[-2][-22:-2] != 'WellformedReadFilter'
+        t1 = not self.applybqsr[-2].endswith('WellformedReadFilter', 0, -2)
 
         if t1:
             raise Exception('check_applybqsr_quantization: ' + self.sample + ' the quantization part did not '
@@ -1,5 +1,31 @@
-from .log_analysis_new import Parent
-import re
+from .log_analysis_new import Parent, GC_SPACES, starts_with_date, failed_conditions, \
+    unexpected_rows, ENGINE_ROWS
+
+# Input files the features have to be extracted from
+_FEATURE_FILES = ['hg38_resources/dbsnp_reannotated.vcf',
+                  'hg38_resources/Mills_and_1000G_gold_standard.indels.hg38.vcf',
+                  'hg38_resources/1000G_omni2.5.hg38.vcf',
+                  'hg38_resources/wgs_calling_regions.hg38.interval_list']
+
+# Rows (and their expected ending) of the baserecalibrator section with the covariates used
+_COVARIATE_ROWS = ((22, 'ReadGroupCovariate'),
+                   (23, 'QualityScoreCovariate'),
+                   (24, 'ContextCovariate'),
+                   (25, 'CycleCovariate'))
+
+# Rows (and their expected ending) of the baserecalibrator section with the filters used
+_FILTER_ROWS = ((27, 'MappingQualityAvailableReadFilter'),
+                (28, 'MappedReadFilter'),
+                (29, 'NotSecondaryAlignmentReadFilter'),
+                (30, 'NotDuplicateReadFilter'),
+                (31, 'PassesVendorQualityCheckReadFilter'),
+                (32, 'WellformedReadFilter'))
+
+# Rows (and their expected ending) of the baserecalibrator section with the quantization and report steps
+_QUANTIZATION_ROWS = ((33, 'Calculating quantized quality scores...'),
+                      (34, 'Writing recalibration report...'),
+                      (35, '...done!'))
+
 
 class BaseRecalibrator(Parent):
     """
@@ -41,23 +67,23 @@ class BaseRecalibrator(Parent):
         progressmeter_bool = False
 
         for row in self.log_file:
-            if row[:-1] == '[Global flags]':
+            if row == '[Global flags]\n':
                 global_flags_bool = True
                 continue
 
-            if bool(re.search(r'(\d+-\d+-\d+)', row[:10])):
+            if starts_with_date(row):
                 global_flags_bool = False
 
-            if bool(re.search(r'INFO  BaseRecalibrat', row)):
+            if 'INFO  BaseRecalibrat' in row:
                 baserecalibrator_bool = True
 
-            if bool(re.search(r'read\(s\) filtered by:', row)):
+            if 'read(s) filtered by:' in row:
                 baserecalibrator_bool = True
 
-            if bool(re.search(r'INFO  ProgressMeter', row)):
+            if 'INFO  ProgressMeter' in row:
                 progressmeter_bool = True
 
-            if bool(re.search(r'INFO  FeatureManager', row)):
+            if 'INFO  FeatureManager' in row:
                 featuremanager_bool = True
 
             if global_flags_bool:
@@ -187,8 +213,8 @@ class BaseRecalibrator(Parent):
         - ``ParOldGen``
         - ``Metaspace``
         """
-        s = ''.join(self.final_section[3:])
-        if len(re.findall(r"\bPSYoungGen\b|\bParOldGen\b|\bMetaspace\b", s)) != 3:
+        rows = self.final_section[3:]
+        if not all(any(i in row for row in rows) for i in GC_SPACES):
             raise Exception('check_final_section_others: ' + self.sample + ' not all the expected fields are present '
                                                                            'in the last part of the log')
 
@@ -201,15 +227,7 @@ class BaseRecalibrator(Parent):
         - ``hg38_resources/1000G_omni2.5.hg38.vcf``
         - ``hg38_resources/wgs_calling_regions.hg38.interval_list``
         """
-
-        list_ = ['hg38_resources/dbsnp_reannotated.vcf',
-                 'hg38_resources/Mills_and_1000G_gold_standard.indels.hg38.vcf',
-                 'hg38_resources/1000G_omni2.5.hg38.vcf',
-                 'hg38_resources/wgs_calling_regions.hg38.interval_list']
-
-        s_check = ''.join(['\\' + 'b' + i + '\\' + 'b|' for i in list_])[:-1]
-        s = ''.join(self.featuremanager)
-        if len(re.findall(s_check, s)) != 4:
+        if not all(any(i in row for row in self.featuremanager) for i in _FEATURE_FILES):
             raise Exception('check_featuremanager_files: ' + self.sample + ' did not get the features from the correct '
                                                                            'input files')
 
@@ -239,12 +257,10 @@ class BaseRecalibrator(Parent):
         - ``Done initializing engine``
         - ``Shutting down engine``
         """
-        t1 = self.baserecalibrator[19][-20:-1] != 'Initializing engine'
-        t2 = self.baserecalibrator[20][-25:-1] != 'Done initializing engine'
-        t3 = self.baserecalibrator[-1][-21:-1] != 'Shutting down engine'
+        failed = unexpected_rows(self.baserecalibrator, ENGINE_ROWS)
 
-        if t1 | t2 | t3:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3']))
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_baserecalibrator_engine: ' + self.sample + ' baserecalibrator engine did not work '
                                                                               'properly. Issue in condition/s: ', error)
 
@@ -257,13 +273,10 @@ class BaseRecalibrator(Parent):
         - ``ContextCovariate``
         - ``CycleCovariate``
         """
-        t1 = self.baserecalibrator[22][-19:-1] != 'ReadGroupCovariate'
-        t2 = self.baserecalibrator[23][-22:-1] != 'QualityScoreCovariate'
-        t3 = self.baserecalibrator[24][-17:-1] != 'ContextCovariate'
-        t4 = self.baserecalibrator[25][-15:-1] != 'CycleCovariate'
+        failed = unexpected_rows(self.baserecalibrator, _COVARIATE_ROWS)
 
-        if t1 | t2 | t3 | t4:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3', t4 * 't4']))
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_baserecalibrator_engine: ' + self.sample + ' not all the covariates have been used. '
                                                                               'Issue in condition/s: ', error)
 
@@ -278,15 +291,10 @@ class BaseRecalibrator(Parent):
         - ``PassesVendorQualityCheckReadFilter``
         - ``WellformedReadFilter``
         """
-        t1 = self.baserecalibrator[27][-35:-2] != 'MappingQualityAvailableReadFilter'
-        t2 = self.baserecalibrator[28][-18:-2] != 'MappedReadFilter'
-        t3 = self.baserecalibrator[29][-33:-2] != 'NotSecondaryAlignmentReadFilter'
-        t4 = self.baserecalibrator[30][-24:-2] != 'NotDuplicateReadFilter'
-        t5 = self.baserecalibrator[31][-36:-2] != 'PassesVendorQualityCheckReadFilter'
-        t6 = self.baserecalibrator[32][-22:-2] != 'WellformedReadFilter'
-
-        if t1 | t2 | t3 | t4 | t5 | t6:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3', t4 * 't4', t5 * 't5', t6 * 't6']))
+        failed = unexpected_rows(self.baserecalibrator, _FILTER_ROWS, cut=2)
+
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_baserecalibrator_filters: ' + self.sample + ' not all the correct filters have been '
                                                                                'used on the base recalibrator. '
                                                                                'Issue in condition/s: ', error)
@@ -301,14 +309,15 @@ class BaseRecalibrator(Parent):
         - ``BaseRecalibrator was able to recalibrate 371510 reads``
         - We also check that the recalibration is done over a number greater than 0
         """
-        t1 = self.baserecalibrator[33][-40:-1] != 'Calculating quantized quality scores...'
-        t2 = self.baserecalibrator[34][-32:-1] != 'Writing recalibration report...'
-        t3 = self.baserecalibrator[35][-9:-1] != '...done!'
-        t4 = re.sub(r'[0-9]', '', self.baserecalibrator[36][38:-1]) != 'BaseRecalibrator was able to recalibrate  reads'
-        t5 = int(re.findall(r'\d+', self.baserecalibrator[36][38:-1])[0]) < 0
+        t1, t2, t3 = unexpected_rows(self.baserecalibrator, _QUANTIZATION_ROWS)
+        # ['BaseRecalibrator', 'was', 'able', 'to', 'recalibrate', '371510', 'reads']
+        recalibrate_text = self.baserecalibrator[36][38:-1].split(' ')
+        t4 = (recalibrate_text[:5] != ['BaseRecalibrator', 'was', 'able', 'to', 'recalibrate'] or
+              recalibrate_text[6:] != ['reads'])
+        t5 = not t4 and not recalibrate_text[5].isdigit()
 
         if t1 | t2 | t3 | t4 | t5:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3', t4 * 't4', t5 * 't5']))
+            error = failed_conditions(t1, t2, t3, t4, t5)
             raise Exception('check_baserecalibrator_quantization: ' + self.sample + ' the quantization part did not '
                                                                                     'work properly. Issue in '
                                                                                     'condition/s: ', error)
@@ -1,9 +1,16 @@
-from .log_analysis_new import LogMain
-import pandas as pd
-import re
+from .log_analysis_new import LogMain, load_fastq_table, read_lines, DIGITS, SIGNED_FLOAT
 import glob
 import os 
 
+# Row with the candidate pairs of a batch, followed by the counts: (7, 322829, 12, 5)
+_CANDIDATE_PAIRS = '[M::mem_pestat] # candidate unique pairs for (FF, FR, RF, RR): ('
+
+# Steps logged by bwa, in order, after analyzing an orientation with enough pairs
+_ENOUGH_PAIRS_STEPS = ('[M::mem_pestat] (25, 50, 75) percentile:',
+                       '[M::mem_pestat] low and high boundaries for computing mean and std.dev:',
+                       '[M::mem_pestat] mean and std.dev:',
+                       '[M::mem_pestat] low and high boundaries for proper pairs:')
+
 
 class Bwa(LogMain):
     """
@@ -20,6 +27,7 @@ class Bwa(LogMain):
         self.process = []
         self.mem_pestat = []
         self.mem_process_seqs = []
+        self.pair_counts = {}
         self.split_log()
 
     def single_paired(self, table_path='data/fastq.csv'):
@@ -31,9 +39,7 @@ class Bwa(LogMain):
         """
         
         try:
-            df = pd.read_csv(table_path)
-            bool_ = len(df[df.Sample == self.sample]) == 2
-            return bool_
+            return load_fastq_table(table_path)[self.sample] == 2
         except IsADirectoryError as e:
             path = table_path + '/*.gz'
             files = glob.glob(path)
@@ -44,8 +50,7 @@ class Bwa(LogMain):
         """
         Method to store the log file as part of the class variables
         """
-        with open(self.path + self.sample + '.log') as f:
-            self.log_file = f.readlines()
+        self.log_file = read_lines(self.path + self.sample + '.log')
 
     def split_log(self):
         """
@@ -58,11 +63,11 @@ class Bwa(LogMain):
         """
 
         for row in self.log_file:
-            if row[:12] == '[M::process]':
+            if row.startswith('[M::process]'):
                 self.process.append(row)
-            elif row[:15] == '[M::mem_pestat]':
+            elif row.startswith('[M::mem_pestat]'):
                 self.mem_pestat.append(row)
-            elif row[:21] == '[M::mem_process_seqs]':
+            elif row.startswith('[M::mem_process_seqs]'):
                 self.mem_process_seqs.append(row)
 
     def check_log(self, check_process=True, check_mem_process_seqs=True, check_mem_pestat=True, check_start_statement=True, 
@@ -92,6 +97,22 @@ class Bwa(LogMain):
         if check_tmp:
             self.check_tmp_files()
 
+    @staticmethod
+    def _iter_batches(rows):
+        """
+        Aux function, yield the mem_pestat rows grouped in batches, each one starting with its candidate pairs row
+        """
+        batch = None
+        for row in rows:
+            if row.startswith(_CANDIDATE_PAIRS):
+                if batch is not None:
+                    yield batch
+                batch = [row]
+            elif batch is not None:
+                batch.append(row)
+        if batch is not None:
+            yield batch
+
     def _batch(self, iterable, n=1):
         l = len(iterable)
         for ndx in range(0, l, n):
@@ -104,9 +125,9 @@ class Bwa(LogMain):
         ``check_num_sequence``
         ``check_consistency``
         """
-        for batch in self._batch(self.process, 2):
-            self.check_num_sequence(batch[0])
-            # self.check_consistency(batch)
+        for num in range(0, len(self.process), 2):
+            self.check_num_sequence(self.process[num])
+            # self.check_consistency(self.process[num:num + 2])
 
     def check_mem_process_seqs(self):
         """
@@ -124,14 +145,7 @@ class Bwa(LogMain):
         ``check_enough_pairs``
         """
         if self.paired:
-
-            batch_nums = []
-            for num, i in enumerate(self.mem_pestat):
-                if i[:27] == '[M::mem_pestat] # candidate':
-                    batch_nums.append(num)
-
-            for i in range(len(batch_nums)-1):
-                batch = self.mem_pestat[batch_nums[i]: batch_nums[i + 1]]
+            for batch in self._iter_batches(self.mem_pestat):
                 self.check_not_enough_pairs(batch)
                 self.check_enough_pairs(batch)
 
@@ -142,7 +156,7 @@ class Bwa(LogMain):
         - ``[M::process] read 400000 sequences (40000000 bp)...``
         - 400000 must be a positive number
         """
-        nums = list(map(float, re.findall(r"[-+]?\d*\.\d+|\d+", row)))
+        nums = list(map(float, SIGNED_FLOAT.findall(row)))
         if any(i <= 0 for i in nums):
             raise Exception('check_positive_nums: ' + self.sample + ' did not process a positive number of sequences')
 
@@ -153,7 +167,7 @@ class Bwa(LogMain):
         - ``[M::process] read 400000 sequences (40000000 bp)...``
         - 400000 must be a positive number
         """
-        seq = re.findall(r'\d+', row)
+        seq = DIGITS.findall(row)
         if any(int(i) < 0 for i in seq):
             raise Exception('check_num_sequence: ' + self.sample + ' did not read a positive number of sequences')
 
@@ -166,14 +180,14 @@ class Bwa(LogMain):
         - 40000 (in the first line) has to be equal to 0 + 400000 (second line)
         """
         if self.paired:
-            seq1 = int(re.findall(r'\d+', rows[0])[0])
-            seq2 = list(map(int, re.findall(r'\d+', rows[1])))
+            seq1 = int(DIGITS.findall(rows[0])[0])
+            seq2 = list(map(int, DIGITS.findall(rows[1])))
             if seq1 != sum(seq2):
                 raise Exception('check_consistency: ' + self.sample + ' has inconsistency in terms of paired-end and '
                                                                       'single-end sequences')
         else:
-            seq1 = int(re.findall(r'\d+', rows[0])[0])
-            seq2 = int(re.findall(r'\d+', rows[0])[0])
+            seq1 = int(DIGITS.findall(rows[0])[0])
+            seq2 = int(DIGITS.findall(rows[0])[0])
             if seq1 != seq2:
                 raise Exception('check_consistency: ' + self.sample + ' has inconsistency in terms of read sequences '
                                                                       'and processed sequences')
@@ -184,7 +198,7 @@ class Bwa(LogMain):
 
         - ``[M::bwa_idx_load_from_disk] read 3171 ALT contigs``
         """
-        if self.log_file[0][:-1] != '[M::bwa_idx_load_from_disk] read 3171 ALT contigs':
+        if self.log_file[0] != '[M::bwa_idx_load_from_disk] read 3171 ALT contigs':
             raise Exception('check_start_statement: ' + self.sample + ' does not have the correct log starting '
                                                                       'statement')
 
@@ -197,9 +211,8 @@ class Bwa(LogMain):
         - Check for [main] Real time:
         - Check real time and CPU times are both positive
         """
-        text = self.log_file[-1][:17]
-        nums = list(map(int, re.findall(r"[-+]?\d*\.\d+|\d+", self.log_file[-1])))
-        if any(i <= 0 for i in nums) | text != '[main] Real time:':
+        row = self.log_file[-1]
+        if not row.startswith('[main] Real time:') or any(float(i) <= 0 for i in SIGNED_FLOAT.findall(row)):
             raise Exception('check_finish_statement: ' + self.sample + ' does not have the final statement we expected')
 
     def check_correct_sample(self):
@@ -209,10 +222,25 @@ class Bwa(LogMain):
         - ``[main] CMD: bwa mem -p -t 8 -R @RG\tID:HSRR062625\tLB:HSRR062625\tSM:HSRR062625\tPU:unknown ...``
         - If we are processing sample HSRR062625 we should only have this value in this string
         """
-        if len(re.findall(self.sample, self.log_file[-2])) == 0:
+        if self.sample not in self.log_file[-2]:
             raise Exception('check_correct_sample: ' + self.sample + ' should be processed however another sample has '
                                                                      'been processed instead')
 
+    def _pair_counts(self, row):
+        """
+        Aux function, FF, FR, RF and RR candidate pairs of a ``# candidate unique pairs`` row. Each row is only parsed
+        once, later batches with the same row reuse the counts
+        :param row: Candidate pairs row which starts the batch
+        :return: Dict with the number of pairs of each orientation
+        """
+        if row not in self.pair_counts:
+            try:
+                ff, fr, rf, rr = map(int, row[len(_CANDIDATE_PAIRS):-1].split(','))
+            except ValueError:
+                raise Exception('check_mem_pestat: ' + self.sample + ' has a malformed candidate pairs row: ' + row)
+            self.pair_counts[row] = {'FF': ff, 'FR': fr, 'RF': rf, 'RR': rr}
+        return self.pair_counts[row]
+
     def check_not_enough_pairs(self, batch, threshold=10):
         """
         Whenever there are not enough pairs the command skips those pairs. This check is only done for paired samples
@@ -223,13 +251,9 @@ class Bwa(LogMain):
         :param threshold: Threshold used to define whether we actually have enough pairs
         """
         if self.paired:
-            FF, FR, RF, RR = list(map(int, batch[0][64:-2].strip().split(',')))
-            self.dict_ = {'FF':FF,
-                     'FR': FR,
-                     'RF': RF,
-                     'RR': RR}
+            self.dict_ = self._pair_counts(batch[0])
             for i in batch[1:]:
-                if (i[:32] == '[M::mem_pestat] skip orientation') & (i[36:-1] == 'as there are not enough pairs'):
+                if i.startswith('[M::mem_pestat] skip orientation') and i.endswith('as there are not enough pairs'):
                     if self.dict_[i[33:35]] > threshold:
                         raise Exception('check_not_enough_pairs ' + self.sample + ' has skipped an orientation due to low '
                                                                               'number of pairs where this is not the '
@@ -246,15 +270,13 @@ class Bwa(LogMain):
         :param threshold: Threshold used to define whether we actually have enough pairs
         """
         if self.paired:
+            self.dict_ = dict_ = self._pair_counts(batch[0])
             for num, i in enumerate(batch):
-                if i[-4:-1] == '...':
-                    if self.dict_[i[-6:-4]] >= threshold:
-                        if ((batch[num + 1][:40] != '[M::mem_pestat] (25, 50, 75) percentile:') |
-                                (batch[num + 2][
-                                 :71] != '[M::mem_pestat] low and high boundaries for computing mean and std.dev:') |
-                                (batch[num + 3][:33] != '[M::mem_pestat] mean and std.dev:') |
-                                (batch[num + 4][
-                                 :57] != '[M::mem_pestat] low and high boundaries for proper pairs:')):
+                if i.endswith('...'):
+                    if dict_[i[-5:-3]] >= threshold:
+                        steps = batch[num + 1:num + 1 + len(_ENOUGH_PAIRS_STEPS)]
+                        if ((len(steps) != len(_ENOUGH_PAIRS_STEPS)) or
+                                not all(step.startswith(prefix) for step, prefix in zip(steps, _ENOUGH_PAIRS_STEPS))):
                             raise Exception('check_enough_pairs ' + self.sample + ' not all the steps of BWA have been '
                                                                                   'executed')
                     else:
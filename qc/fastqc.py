@@ -1,6 +1,5 @@
-from .log_analysis_new import LogMain
+from .log_analysis_new import LogMain, read_lines, DIGITS
 import os
-import re
 
 
 class Fastqc(LogMain):
@@ -19,17 +18,17 @@ class Fastqc(LogMain):
         """
         Method to store the log file as part of the class variables
         """
-        try:
-            with open(self.path + self.sample + '_R1_fastqc.log') as f:
-                self.log_file_1 = f.readlines()
-        except:
-            self.log_file_1 = False
-
-        try:
-            with open(self.path + self.sample + '_R2_fastqc.log') as f:
-                self.log_file_2 = f.readlines()
-        except:
-            self.log_file_2 = False
+        self.log_file_1 = self._read_file(self.path + self.sample + '_R1_fastqc.log')
+        self.log_file_2 = self._read_file(self.path + self.sample + '_R2_fastqc.log')
+
+    @staticmethod
+    def _read_file(path):
+        """
+        Aux function, read the lines of a log or return None if it does not exist (single samples have no R2 log)
+        """
+        if not os.path.isfile(path):
+            return None
+        return read_lines(path)
 
     def check_log(self, check_lines=True, check_start_end=True, check_folder=True):
         """
@@ -53,15 +52,10 @@ class Fastqc(LogMain):
 
         - We expect 21 lines in the log
         """
-        if self.log_file_1:
-            if (len(self.log_file_1) != 21) & (len(self.log_file_1) != 22):
-                raise Exception('check_lines: ' + self.sample + '_R1 does not have the correct number of lines \n' + 
-                                ' '.join(self.log_file_1[20:] if len(self.log_file_1) > 20 else self.log_file_1[-7:]))
-
-        if self.log_file_2:
-            if (len(self.log_file_2) != 21) & (len(self.log_file_2) != 22):
-                raise Exception('check_lines: ' + self.sample + '_R2 does not have the correct number of lines \n' + 
-                                ' '.join(self.log_file_2[20:] if len(self.log_file_2) > 20 else self.log_file_2[-7:]))
+        for log_file, read in ((self.log_file_1, '_R1'), (self.log_file_2, '_R2')):
+            if log_file is not None and len(log_file) not in (21, 22):
+                raise Exception('check_lines: ' + self.sample + read + ' does not have the correct number of lines \n' +
+                                '\n'.join(log_file[20:] if len(log_file) > 20 else log_file[-7:]))
 
     def check_start_end(self):
         """
@@ -70,13 +64,10 @@ class Fastqc(LogMain):
         - ``Started analysis`` is the start log line
         - ``Analysis complete`` is the end log line
         """
-        if self.log_file_1:
-            if (self.log_file_1[0][:16] != 'Started analysis') | (self.log_file_1[-1][:17] != 'Analysis complete'):
-                raise Exception('check_lines: ' + self.sample + '_R1 does not seem to have been processed properly')
-
-        if self.log_file_2:
-            if (self.log_file_2[0][:16] != 'Started analysis') | (self.log_file_2[-1][:17] != 'Analysis complete'):
-                raise Exception('check_lines: ' + self.sample + '_R2 does not seem to have been processed properly')
+        for log_file, read in ((self.log_file_1, '_R1'), (self.log_file_2, '_R2')):
+            if log_file and (not log_file[0].startswith('Started analysis') or
+                             not log_file[-1].startswith('Analysis complete')):
+                raise Exception('check_lines: ' + self.sample + read + ' does not seem to have been processed properly')
 
     def check_folders(self):
         """
@@ -93,12 +84,12 @@ class Fastqc(LogMain):
         with open(self.path + '/' + self.sample + '_R1_fastqc' + '/' + 'fastqc_data.txt') as f:
             txt1 = f.readlines()
 
-        val1 = int(re.findall(r'\d+',txt1[6])[0])
+        val1 = int(DIGITS.findall(txt1[6])[0])
 
         with open(self.path + '/' + self.sample + '_R2_fastqc' + '/' + 'fastqc_data.txt') as f:
             txt2 = f.readlines()
 
-        val2 = int(re.findall(r'\d+',txt2[6])[0])
+        val2 = int(DIGITS.findall(txt2[6])[0])
 
         if val1 != val2:
-            raise Exception('check_txt: ' + self.sample + ' the number of sequences processed are different and should be the same \n', val1, val2)
\ No newline at end of file
+            raise Exception('check_txt: ' + self.sample + ' the number of sequences processed are different and should be the same \n', val1, val2)
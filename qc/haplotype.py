@@ -1,7 +1,20 @@
-from .log_analysis_new import Parent
-import re
+from .log_analysis_new import Parent, failed_conditions, unexpected_rows, ENGINE_ROWS
 import matplotlib.pyplot as plt
-from collections import defaultdict
+from collections import Counter
+
+# Input files the features have to be extracted from
+_FEATURE_FILES = ['hg38_resources/wgs_calling_regions.hg38.interval_list']
+
+# Rows (and their expected ending) of the haplotype section with the filters used
+_FILTER_ROWS = ((25, 'MappingQualityAvailableReadFilter'),
+                (26, 'MappedReadFilter'),
+                (27, 'NotSecondaryAlignmentReadFilter'),
+                (28, 'NotDuplicateReadFilter'),
+                (29, 'PassesVendorQualityCheckReadFilter'),
+                (30, 'NonZeroReferenceLengthAlignmentReadFilter'),
+                (31, 'GoodCigarReadFilter'),
+                (32, 'WellformedReadFilter'))
+
 
 class HaploType(Parent):
     """
@@ -37,19 +50,19 @@ class HaploType(Parent):
 
         for row in self.log_file:
 
-            if bool(re.search(r'INFO  HaplotypeCaller', row)):
+            if 'INFO  HaplotypeCaller' in row:
                 haplotype_bool = True
 
-            if bool(re.search(r'read\(s\) filtered by:', row)):
+            if 'read(s) filtered by:' in row:
                 haplotype_bool = True
 
-            if bool(re.search(r'INFO  ProgressMeter', row)):
+            if 'INFO  ProgressMeter' in row:
                 progressmeter_bool = True
 
-            if bool(re.search(r'INFO  FeatureManager', row)):
+            if 'INFO  FeatureManager' in row:
                 featuremanager_bool = True
 
-            if bool(re.search(r' WARN ', row)):
+            if ' WARN ' in row:
                 warn_bool = True
 
             if haplotype_bool:
@@ -148,46 +161,26 @@ class HaploType(Parent):
         Method to plot some insights on the warning outputs
         """
 
-        DepthPerSampleHC = []
-        summary_depth = defaultdict(int)
-        StrandBiasBySample = []
-        summary_strand = defaultdict(int)
-        InbreedingCoeff = []
-        summary_inbreed = defaultdict(int)
+        # Chromosome of each warning, per type of warning
+        chroms = {warning: [] for warning in ('DepthPerSampleHC', 'StrandBiasBySample', 'InbreedingCoeff')}
         for row in self.warning:
-            if bool(re.search(r'DepthPerSampleHC', row)):
-                DepthPerSampleHC.append(row)
-                summary_depth[re.findall(r'chr.*:', row)[0][3:-1]] += 1
-            elif bool(re.search(r'StrandBiasBySample', row)):
-                StrandBiasBySample.append(row)
-                summary_strand[re.findall(r'chr.*:', row)[0][3:-1]] += 1
-            elif bool(re.search(r'InbreedingCoeff', row)):
-                InbreedingCoeff.append(row)
-                summary_inbreed[re.findall(r'chr.*:', row)[0][3:-1]] += 1
-
-        plt.figure(figsize=(12, 8))
-        plt.bar(range(len(summary_depth)), list(summary_depth.values()), align='center')
-        plt.xticks(range(len(summary_depth)), list(summary_depth.keys()))
-        plt.ylabel('Number of Errors')
-        plt.xlabel('Chromosomes affected')
-        plt.title(self.sample + '\n' + ' WARN  DepthPerSampleHC')
-        plt.show()
-
-        plt.figure(figsize=(12, 8))
-        plt.bar(range(len(summary_strand)), list(summary_strand.values()), align='center')
-        plt.xticks(range(len(summary_strand)), list(summary_strand.keys()))
-        plt.ylabel('Number of Errors')
-        plt.xlabel('Chromosomes affected')
-        plt.title(self.sample + '\n' + ' WARN  StrandBiasBySample')
-        plt.show()
-
-        plt.figure(figsize=(12, 8))
-        plt.bar(range(len(summary_inbreed)), list(summary_inbreed.values()), align='center')
-        plt.xticks(range(len(summary_inbreed)), list(summary_inbreed.keys()))
-        plt.ylabel('Number of Errors')
-        plt.xlabel('Chromosomes affected')
-        plt.title(self.sample + '\n' + ' WARN  InbreedingCoeff')
-        plt.show()
+            for warning, rows in chroms.items():
+                if warning in row:
+                    rows.append(row.partition('chr')[2].rpartition(':')[0])
+                    break
+
+        for warning, rows in chroms.items():
+            summary = Counter(rows)
+            idx = range(len(summary))
+            fig = plt.figure(figsize=(12, 8))
+            plt.bar(idx, list(summary.values()), align='center')
+            plt.xticks(idx, list(summary))
+            plt.ylabel('Number of Errors')
+            plt.xlabel('Chromosomes affected')
+            plt.title(self.sample + '\n' + ' WARN  ' + warning)
+            plt.show()
+            # Release the figure, with a non-interactive backend (batch runs) show() does not
+            plt.close(fig)
 
     def check_haplotype_engine(self):
         """
@@ -198,12 +191,10 @@ class HaploType(Parent):
         - ``Done initializing engine``
         - ``Shutting down engine``
         """
-        t1 = self.haplotype[19][-20:-1] != 'Initializing engine'
-        t2 = self.haplotype[20][-25:-1] != 'Done initializing engine'
-        t3 = self.haplotype[-1][-21:-1] != 'Shutting down engine'
+        failed = unexpected_rows(self.haplotype, ENGINE_ROWS)
 
-        if t1 | t2 | t3:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3']))
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_haplotype_engine: ' + self.sample + ' haplotype engine did not work properly. '
                                                                        'Issue in condition/s: ', error)
 
@@ -220,18 +211,10 @@ class HaploType(Parent):
         - ``GoodCigarReadFilter``
         - ``WellformedReadFilter``
         """
-        t1 = self.haplotype[25][-35:-2] != 'MappingQualityAvailableReadFilter'
-        t2 = self.haplotype[26][-18:-2] != 'MappedReadFilter'
-        t3 = self.haplotype[27][-33:-2] != 'NotSecondaryAlignmentReadFilter'
-        t4 = self.haplotype[28][-24:-2] != 'NotDuplicateReadFilter'
-        t5 = self.haplotype[29][-36:-2] != 'PassesVendorQualityCheckReadFilter'
-        t6 = self.haplotype[30][-43:-2] != 'NonZeroReferenceLengthAlignmentReadFilter'
-        t7 = self.haplotype[31][-21:-2] != 'GoodCigarReadFilter'
-        t8 = self.haplotype[32][-22:-2] != 'WellformedReadFilter'
-
-        if t1 | t2 | t3 | t4 | t5 | t6 | t7 | t8:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3', t4 * 't4', t5 * 't5',
-                                           t6 * 't6', t7 * 't7', t8 * 't8']))
+        failed = unexpected_rows(self.haplotype, _FILTER_ROWS, cut=2)
+
+        if any(failed):
+            error = failed_conditions(*failed)
             raise Exception('check_haplotype_filters: ' + self.sample + ' not all the correct filters have been '
                                                                                'used on the haplotype. '
                                                                         'Issue in condition/s: ', error)
@@ -242,11 +225,6 @@ class HaploType(Parent):
 
         - ``hg38_resources/wgs_calling_regions.hg38.interval_list``
         """
-
-        list_ = ['hg38_resources/wgs_calling_regions.hg38.interval_list']
-
-        s_check = ''.join(['\\' + 'b' + i + '\\' + 'b|' for i in list_])[:-1]
-        s = ''.join(self.featuremanager)
-        if len(re.findall(s_check, s)) != 1:
+        if not all(any(i in row for row in self.featuremanager) for i in _FEATURE_FILES):
             raise Exception('check_featuremanager_files: ' + self.sample + ' did not get the features from the correct '
                                                                            'input files')
@@ -1,12 +1,97 @@
 from abc import ABCMeta, abstractmethod
-import re
 import numpy as np
+import re
 import pandas as pd
 import os
 import matplotlib.pyplot as plt
-from collections import defaultdict
+from collections import defaultdict, Counter
+from functools import lru_cache
 import subprocess
+import shutil
 import glob
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+# Number patterns shared by the Bwa, SamSort and Fastqc checks
+DIGITS = re.compile(r'\d+')
+SIGNED_FLOAT = re.compile(r"[-+]?\d*\.\d+|\d+")
+
+GC_SPACES = ('PSYoungGen', 'ParOldGen', 'Metaspace')
+
+# Chromosomes expected (in order) in the progressmeter section, chrY has been removed
+_CHROMOSOMES = ['chr1', 'chr2', 'chr3', 'chr4', 'chr5', 'chr6', 'chr7', 'chr8', 'chr9', 'chr10', 'chr11', 'chr12', 'chr13',
+                'chr14', 'chr15', 'chr16', 'chr17', 'chr18', 'chr19', 'chr20', 'chr21', 'chr22', 'chrX']
+_CHROMOSOMES_SET = frozenset(_CHROMOSOMES)
+
+# Rows (and their expected ending) of the engine start and end in the GATK tool sections
+ENGINE_ROWS = ((19, 'Initializing engine'),
+                (20, 'Done initializing engine'),
+                (-1, 'Shutting down engine'))
+
+# Rows of the global flags which change based on the computer session used (see check_global_flags_variables)
+_SESSION_FLAG_ROWS = frozenset([55, 257, 304, 316, 349, 360])
+
+
+@lru_cache(maxsize=None)
+def load_fastq_table(table_path):
+    """
+    Read the fastq.csv table once and count how many fastq files (R1, R2) each sample has. The result is cached so
+    that all the instances created for a run share a single read of the table
+    :param table_path: Path in which we can find the fastq.csv
+    :return: Counter with the number of rows of each sample
+    """
+    # utf-8-sig since the table is saved with a BOM in front of the Sample header
+    with open(table_path, newline='', encoding='utf-8-sig') as f:
+        return Counter(row['Sample'] for row in csv.DictReader(f))
+
+
+def read_lines(path):
+    """
+    Read a Bwa, SamSort or Fastqc log in a single read, undecodable bytes are replaced instead of failing the read
+    :param path: Path of the log file
+    :return: List with the rows of the log, without the new line characters
+    """
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8', 'replace').splitlines()
+
+
+def starts_with_date(row):
+    """
+    Check whether the row starts with a date (``2021-06-01 ...``), these rows close the global flags section of the
+    GATK logs
+    """
+    return (len(row) >= 10 and row[4] == '-' and row[7] == '-' and row[:4].isdigit() and row[5:7].isdigit() and
+            row[8:10].isdigit())
+
+
+def failed_conditions(*conditions):
+    """
+    Aux function, name the conditions (t1, t2, ...) of a check which are True so that they can be reported in its error
+    """
+    return ','.join('t' + str(num) for num, condition in enumerate(conditions, 1) if condition)
+
+
+def unexpected_rows(section, rows, cut=1):
+    """
+    Aux function, check that the rows of a section end with the expected text
+    :param section: List with the rows of the section
+    :param rows: Pairs of (row number, expected text)
+    :param cut: Number of trailing characters (new line, spaces) to ignore at the end of each row
+    :return: List of booleans (t1, t2, ...) which are True for the rows without the expected text
+    """
+    return [not section[num].endswith(text, 0, -cut) for num, text in rows]
+
+
+@lru_cache(maxsize=8)
+def _load_template(path):
+    """
+    Read each global flags template once, all the instances of a run share it (as a tuple so that it can not be
+    modified). BaseRecalibrator and ApplyBQSR can be given different templates, so more than one is kept
+    :param path: Path in which we can find the template
+    :return: Tuple with the rows of the template
+    """
+    with open(path) as f:
+        return tuple(f.readlines())
 
 
 class LogMain(metaclass=ABCMeta):
@@ -54,15 +139,28 @@ class Overall:
         """
 
         try:
-            df = pd.read_csv(table_path)
-            bool_ = len(df[df.Sample == self.sample]) == 2
-            return bool_
+            return load_fastq_table(table_path)[self.sample] == 2
         except IsADirectoryError as e:
             path = table_path + '/*.gz'
             files = glob.glob(path)
             bool_ = len(files) == 2
             return bool_
 
+    @staticmethod
+    def _count_lines(path):
+        """
+        Aux function, count the lines of a gzipped file without loading it into python. pigz is used (parallel
+        decompression) when it is installed. Both ends of the pipe are checked, a missing or corrupt file makes the
+        decompression fail while wc still counts 0 lines
+        """
+        unzip = ['pigz', '-dc'] if shutil.which('pigz') else ['zcat']
+        with subprocess.Popen(unzip + [path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as p_unzip:
+            res = subprocess.run(['wc', '-l'], stdin=p_unzip.stdout, capture_output=True, text=True, check=True)
+            p_unzip.stdout.close()
+            if p_unzip.wait() != 0:
+                raise Exception('check_sample_length: ' + path + ' could not be decompressed')
+        return int(res.stdout.split()[0])
+
     def check_sample_length(self):
         """
         Check that the sample has the correct length:
@@ -72,15 +170,15 @@ class Overall:
         """
 
         if self.paired:
-            path_R1 = self.path + self.sample + '_R1.gastq.gz'
-            path_R2 = self.path + self.sample + '_R2.gastq.gz'
-            res_R1 = subprocess.run(['zcat', path_R1, '|', 'wc', '-l'])
-            res_R2 = subprocess.run(['zcat', path_R2, '|', 'wc', '-l'])
+            path_R1 = self.path + self.sample + '_R1.fastq.gz'
+            path_R2 = self.path + self.sample + '_R2.fastq.gz'
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                res_R1, res_R2 = executor.map(self._count_lines, [path_R1, path_R2])
             if res_R1 != res_R2:
                 raise Exception('check_sample_length:', self.sample, ' is paired but does not have the same length')
         else:
-            path_R1 = self.path + self.sample + '.gastq.gz'
-            res = subprocess.run(['zcat', path_R1, '|', 'wc', '-l'])
+            path_R1 = self.path + self.sample + '.fastq.gz'
+            res = self._count_lines(path_R1)
             if res % 4 != 0:
                 raise Exception('check_sample_length:', self.sample, ' is single but does not have the correct '
                                                                      'sample length')
@@ -161,9 +259,7 @@ class Parent(LogMain):
         """
 
         try:
-            df = pd.read_csv(table_path)
-            bool_ = len(df[df.Sample == self.sample]) == 2
-            return bool_
+            return load_fastq_table(table_path)[self.sample] == 2
         except FileNotFoundError as e:
             path = table_path + '/*.gz'
             files = glob.glob(path)
@@ -185,8 +281,7 @@ class Parent(LogMain):
         """
         We read the global flag template so that we can compare this part more easily
         """
-        with open(path) as f:
-            self.log_template = f.readlines()
+        self.log_template = _load_template(path)
 
     def check_output_exists(self, file='data/OUTPUT/something.sam'):
         """
@@ -211,7 +306,7 @@ class Parent(LogMain):
 
         - If we are processing sample HSRR062650 we should only have this value in the command line string
         """
-        if len(re.findall(self.sample, self.log_file[2][:-1])) == 0:
+        if self.sample not in self.log_file[2]:
             raise Exception('check_correct_sample: ' + self.sample + ' should be processed however another sample has '
                                                                      'been processed instead')
 
@@ -241,8 +336,8 @@ class Parent(LogMain):
         - ``ParOldGen``
         - ``Metaspace``
         """
-        s = ''.join(self.final_section[3:])
-        if len(re.findall(r"\bPSYoungGen\b|\bParOldGen\b|\bMetaspace\b", s)) != 3:
+        rows = self.final_section[3:]
+        if not all(any(i in row for row in rows) for i in GC_SPACES):
             raise Exception('check_final_section_others: ' + self.sample + ' not all the expected fields are present '
                                                                            'in the last part of the log')
 
@@ -250,9 +345,10 @@ class Parent(LogMain):
         """
         Method to check the length of the global flags section
 
-        - The length should be 722
+        - The length should be that of the template (722 rows), ``check_global_flags_variables`` compares them row by
+          row
         """
-        if len(self.global_flags) != 722:
+        if len(self.global_flags) != len(self.log_template):
             raise Exception('check_global_flags_length: ' + self.sample + ' does not have the expected number of rows')
 
     def check_global_flags_variables(self):
@@ -269,13 +365,12 @@ class Parent(LogMain):
             - ``uintx OldSize``
         - All other variables should be the same
         """
-        for row in range(len(self.global_flags)):
-            original = self.global_flags[row]
-            template = self.log_template[row]
+        diff = {row for row, (original, template) in enumerate(zip(self.global_flags, self.log_template))
+                if original != template}
 
-            if (original != template) & (row not in [55, 257, 304, 316, 349, 360]):
-                raise Exception('check_global_flags_variables: ' + self.sample + ' does not have the right global '
-                                                                                 'flags')
+        if not diff <= _SESSION_FLAG_ROWS:
+            raise Exception('check_global_flags_variables: ' + self.sample + ' does not have the right global '
+                                                                             'flags')
 
     # Removed CHRY
     def check_progressmeter_chromosomes(self):
@@ -284,31 +379,23 @@ class Parent(LogMain):
         - We also take the chance to check all chromsome ids are positive integers
         - We also check that the regions are also positive integers
         """
-        # Split the data for further analysis
-        chromosome = []
-        chromosome_id = []
-        regions = []
-
-        chr_temp = ['chr1', 'chr2', 'chr3', 'chr4', 'chr5', 'chr6', 'chr7', 'chr8', 'chr9', 'chr10', 'chr11', 'chr12',
-                    'chr13', 'chr14', 'chr15', 'chr16', 'chr17', 'chr18', 'chr19', 'chr20', 'chr21', 'chr22',
-                    'chrX']
+        # Split the data for further analysis: chr1:1000 --> chr1, 1000
+        rows = [row.split() for row in self.progressmeter[2:-1]]
+        locus = [row[4].partition(':') for row in rows]
+        chromosome = [chrom for chrom, _, _ in locus]
+        chromosome_id = np.fromiter((chrom_id for _, _, chrom_id in locus), dtype=np.int64, count=len(locus))
+        regions = np.fromiter((row[6] for row in rows), dtype=np.int64, count=len(rows))
 
-        for row in self.progressmeter[2:-1]:
-            _, _, _, _, chrom, _, region, _ = row.split()
-            chrom, chrom_id = chrom.split(':')
-            chromosome.append(chrom)
-            chromosome_id.append(int(chrom_id))
-            regions.append(int(region))
-
-        t1 = list(dict.fromkeys(chromosome)) != chr_temp
-        t2 = any(i < 0 for i in chromosome_id)
-        t3 = any(i < 0 for i in regions)
+        chromosome = list(dict.fromkeys(chromosome))
+        t1 = chromosome != _CHROMOSOMES
+        t2 = bool((chromosome_id < 0).any())
+        t3 = bool((regions < 0).any())
 
         if t1 | t2 | t3:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2', t3 * 't3']))
+            error = failed_conditions(t1, t2, t3)
             self.progressmeter_analysis(title='ApplyBQSR')
             if t1:
-                error = error + ' --> ' + list(set(chr_temp).difference(set(list(dict.fromkeys(chromosome)))))[0]
+                error = error + ' --> ' + list(_CHROMOSOMES_SET.difference(chromosome))[0]
             raise Exception('check_progressmeter_chromosomes: ' + self.sample + ' has some strange chromosome values '
                                                                                 'or is missing some chromosomes to be '
                                                                                 'inspected. Issue in '
@@ -334,16 +421,19 @@ class Parent(LogMain):
         - ``Traversal complete. Processed 180757 total reads in 2.6 minutes.``
         - We check that the strings are correct and also that the numeric part is larger than 0
         """
-        start_text = self.progressmeter[0][-19:-1]
-        end_text = re.findall('Traversal complete. Processed', self.progressmeter[-1][15:])
-        end_nums = list(map(float, re.findall(r"[-+]?\d*\.\d+|\d+", self.progressmeter[-1][15:])))
+        # ['180757', 'total', 'reads', 'in', '2.6', 'minutes.']
+        end_text = self.progressmeter[-1].partition('Traversal complete. Processed ')[2].split()
 
-        t1 = start_text != 'Starting traversal'
-        t2 = len(end_text) != 1
-        t3 = any(i <= 0 for i in end_nums)
+        t1 = not self.progressmeter[0].endswith('Starting traversal', 0, -1)
+        t2 = end_text[1:4] != ['total', 'reads', 'in'] or end_text[5:] != ['minutes.']
+        try:
+            t3 = not t2 and (int(end_text[0]) <= 0 or float(end_text[4]) <= 0)
+        except ValueError:
+            # Read count or minutes are not numbers
+            t3 = True
 
         if t1 | t2 | t3:
-            error = ','.join(filter(None, [t1*'t1', t2*'t2', t3*'t3']))
+            error = failed_conditions(t1, t2, t3)
             raise Exception('check_progressmeter_start_end: ' + self.sample + ' does not have the correct start and '
                                                                               'end statements in the ProgressMeter '
                                                                               'section. Issue in condition/s: ', error)
@@ -353,11 +443,23 @@ class Parent(LogMain):
         Visual test to see whether the output is in line with our expectations
         """
 
+        # Count, time and reads of each chromosome, a single dict lookup per row
+        stats = {}
         for row in self.progressmeter[2:-1]:
             row_split = row.split()
-            self.chr_count[re.findall(r'chr.*:', row_split[4])[0][3:-1]] += 1
-            self.chr_time[re.findall(r'chr.*:', row_split[4])[0][3:-1]] += float(row_split[5])
-            self.chr_reads[re.findall(r'chr.*:', row_split[4])[0][3:-1]] += int(row_split[6])
+            # chr1:1000 --> 1
+            chrom = row_split[4].partition('chr')[2].rpartition(':')[0]
+            chrom_stats = stats.get(chrom)
+            if chrom_stats is None:
+                chrom_stats = stats[chrom] = [0, 0.0, 0]
+            chrom_stats[0] += 1
+            chrom_stats[1] += float(row_split[5])
+            chrom_stats[2] += int(row_split[6])
+
+        for chrom, (count, time, reads) in stats.items():
+            self.chr_count[chrom] += count
+            self.chr_time[chrom] += time
+            self.chr_reads[chrom] += reads
 
 
 def df_func(list_, header=['Sample', 'Sample_Score']):
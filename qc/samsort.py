@@ -1,9 +1,11 @@
-from .log_analysis_new import LogMain
-import pandas as pd
+from .log_analysis_new import LogMain, load_fastq_table, read_lines, failed_conditions, DIGITS, SIGNED_FLOAT
 import re
 import numpy as np
 import glob
 
+_IS_NUM = re.compile(r'^[-+]?(?:\d+\.?\d*|\.\d+)$')
+
+
 class SamSort(LogMain):
     """
     This class will check the samsort log
@@ -16,6 +18,7 @@ class SamSort(LogMain):
         self.paired = self.single_paired(table_path)
         self.read_log()
         self.dups = None
+        self.table = None
 
     def single_paired(self, table_path='data/fastq.csv'):
         """
@@ -25,9 +28,7 @@ class SamSort(LogMain):
         :return: Boolean value which will be stored as part of the class variables
         """
         try:
-            df = pd.read_csv(table_path)
-            bool_ = len(df[df.Sample == self.sample]) == 2
-            return bool_
+            return load_fastq_table(table_path)[self.sample] == 2
         except FileNotFoundError as e:
             path = table_path + '/*.gz'
             files = glob.glob(path)
@@ -38,10 +39,8 @@ class SamSort(LogMain):
         """
         Method to store the log file as part of the class variables
         """
-        with open(self.path + self.sample + '_samblaster.log') as f:
-            self.log_file = f.readlines()
-        with open(self.path + self.sample + '_sort_nodup.sam.log') as f:
-            self.log_file_2 = f.readlines()
+        self.log_file = read_lines(self.path + self.sample + '_samblaster.log')
+        self.log_file_2 = read_lines(self.path + self.sample + '_sort_nodup.sam.log')
 
     def check_log(self, check_lines=True, check_start_statement=True, check_finish_statement=True, check_correct_sample=True,
                   check_unmated=True, check_header=True, check_rows=True, check_table_sums=True, check_removals=True):
@@ -88,7 +87,7 @@ class SamSort(LogMain):
         - In case of single samples (R1) the log should contain 13 lines
         """
         if self.paired:
-            if (len(self.log_file) != 14) & (len(self.log_file) != 15):
+            if len(self.log_file) not in (14, 15):
                 raise Exception('check_lines: ' + self.sample + ' which is paired has the wrong number of log lines')
         else:
             if len(self.log_file) != 13:
@@ -100,7 +99,7 @@ class SamSort(LogMain):
 
         - ``samblaster: Version 0.1.26``
         """
-        if self.log_file[0][:-1] != 'samblaster: Version 0.1.26':
+        if self.log_file[0] != 'samblaster: Version 0.1.26':
             raise Exception('check_start_statement: ' + self.sample + ' does not have the correct log starting '
                                                                       'statement')
 
@@ -108,10 +107,12 @@ class SamSort(LogMain):
         """
         Make sure that the final log statement is the expected one.
 
-        - ``[bam_sort_core] merging from files and in-memory blocks...``
-        - We remove the numbers from the string we check since they are variable
+        - ``[bam_sort_core] merging from 8 files and 0 in-memory blocks...``
+        - We only check the text around the numbers since they are variable
         """
-        if re.sub(r" \d+", "", self.log_file_2[-1][:-1]) != '[bam_sort_core] merging from files and in-memory blocks...':
+        row = self.log_file_2[-1]
+        if (not row.startswith('[bam_sort_core] merging from ') or not row.endswith(' in-memory blocks...') or
+                ' files and ' not in row):
             raise Exception('check_finish_statement: ' + self.sample + ' does not have the final statement we expected')
 
     def check_correct_sample(self):
@@ -121,7 +122,7 @@ class SamSort(LogMain):
         - ``samblaster: Opening OUTPUT_NEW/HSRR062650/bwa/HSRR062650.sam for read``
         - If we are processing sample HSRR062650 we should only have this value in this string
         """
-        if len(re.findall(self.sample, self.log_file[1][:-1])) == 0:
+        if self.sample not in self.log_file[1]:
             raise Exception('check_correct_sample: ' + self.sample + ' should be processed however another sample has '
                                                                      'been processed instead')
 
@@ -131,7 +132,7 @@ class SamSort(LogMain):
 
         - ``samblaster: Outputting to stdout``
         """
-        if self.log_file[2][:-1] != 'samblaster: Outputting to stdout':
+        if self.log_file[2] != 'samblaster: Outputting to stdout':
             raise Exception('check_third_line: ' + self.sample + ' does not have the expected output in line 3')
 
     def check_unmated(self):
@@ -141,30 +142,40 @@ class SamSort(LogMain):
         - ``samblaster: Found 0 of 200000 (0.000%) total read ids are marked paired yet are unmated.``
         - We check 0 and 0.000
         """
-        if ((int(re.findall(r'\d+', self.log_file[4])[0]) != 0) |
-            (float(re.findall(r"[-+]?\d*\.\d+|\d+", self.log_file[4])[-1]) != float(0))):
+        if (int(DIGITS.findall(self.log_file[4])[0]) != 0 or
+                float(SIGNED_FLOAT.findall(self.log_file[4])[-1]) != float(0)):
             raise Exception('check_unmated: ' + self.sample + ' has mated pairs when it should not have them yet')
 
     def check_header(self):
         """
         Check that the header of the table is correct
         """
-        if self.log_file[6].replace(" ", "")[:-1] != 'samblaster:PairTypeType_ID_Count%Type/All_IDsDup_ID_Count%Dups/Type_ID_Count%Dups/All_Dups%Dups/All_IDs':
+        if self.log_file[6].replace(" ", "") != 'samblaster:PairTypeType_ID_Count%Type/All_IDsDup_ID_Count%Dups/Type_ID_Count%Dups/All_Dups%Dups/All_IDs':
             raise Exception('check_header: ' + self.sample + ' does not have the expected table header')
 
 
     @staticmethod
-    def _check_digit(x):
+    def _split_row(row):
         """
-        Aux function, not relevant
+        Aux function, split a table row into its name tokens and its numeric values
         """
-        dig = False
-        try:
-            float(x)
-            dig = True
-        except:
-            pass
-        return dig
+        names, nums = [], []
+        for j in row[12:].split():
+            if _IS_NUM.match(j):
+                nums.append(float(j))
+            else:
+                names.append(j)
+        return names, nums
+
+    def _split_table(self):
+        """
+        Aux function, split the rows of the table (only once) into their names and a 2D array with their values. The
+        output is stored as part of the class variables (``self.table``)
+        """
+        if self.table is None:
+            names, nums = zip(*map(self._split_row, self.log_file[8:-2]))
+            self.table = [' '.join(i) for i in names], np.asarray(nums, dtype=np.float64)
+        return self.table
 
     def check_rows(self):
         """
@@ -174,10 +185,7 @@ class SamSort(LogMain):
         - In the case of singles it should be ['Unmapped Orphan/Singleton', 'Mapped Orphan/Singleton', 'Total']
         """
         # Extract Data
-        list_ = []
-        for i in self.log_file[8:-2]:
-            x = [j for j in i[12:-1].split() if not self._check_digit(j)]
-            list_.append(' '.join(x))
+        list_, _ = self._split_table()
 
         # Check values
         if self.paired:
@@ -194,16 +202,12 @@ class SamSort(LogMain):
         - We are checking that the values and the sums add up
         """
         # Extract data from table
-        list_ = []
-        for i in self.log_file[8:-2]:
-            x = [float(j) for j in i[12:-1].split() if self._check_digit(j)]
-            list_.append(x)
+        _, arr = self._split_table()
 
-        self.dups = int(list_[-1][2])
+        self.dups = int(arr[-1, 2])
 
-        # Perform the summation accordingly
-        sum_ = lambda x: np.isclose(sum(x[:-1]), x[-1], atol=0.001)
-        if any(list(~sum_(np.array(list_))[:3])+list(~sum_(np.array(list_))[4:])):
+        # Each column (except %Dups/Type_ID_Count) of the pair type rows has to add up to the Total row
+        if not np.allclose(np.delete(arr[:-1].sum(axis=0), 3), np.delete(arr[-1], 3), atol=0.001):
             raise Exception('check_table_sums: ' + self.sample + ' has a mismatch in the total sums')
 
     def check_removals(self):
@@ -211,14 +215,12 @@ class SamSort(LogMain):
         Check that the number of removed duplicates matches the number in the table and that the text of the second last
         line of the log are as expected
         """
-        nums = list(map(float, re.findall(r"[-+]?\d*\.\d+|\d+", self.log_file[-1])))
-        text = re.sub(r"\d+", "", self.log_file[-2])[:-1]
+        nums = list(map(float, SIGNED_FLOAT.findall(self.log_file[-1])))
 
         t1 = int(nums[0]) != self.dups
         t2 = any(int(i) < 0 for i in nums)
 
-        # noinspection PyTypeChecker
-        if t1 | t2:
-            error = ','.join(filter(None, [t1 * 't1', t2 * 't2']))
+        if t1 or t2:
+            error = failed_conditions(t1, t2)
             raise Exception('check_removals: ' + self.sample + ' has some issue (text or numeric related). Issue in '
                                                                'condition/s: ' + error)
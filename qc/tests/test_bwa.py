@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_parameters(read_bwa):
     """ basic test to make sure the parameters are read as expected """
 
@@ -13,4 +16,20 @@ def test_parameters(read_bwa):
     assert len(read_bwa.process) > 0
 
     # Make sure the log files has been read correctly
-    assert read_bwa.log_file[0][:-1] == '[M::bwa_idx_load_from_disk] read 3171 ALT contigs'
+    assert read_bwa.log_file[0] == '[M::bwa_idx_load_from_disk] read 3171 ALT contigs'
+
+
+def test_finish_statement(read_bwa):
+    """ the real, CPU and peak memory figures of the last row should be read without errors """
+    read_bwa.check_finish_statement()
+
+
+def test_last_batch_checked(read_bwa):
+    """ the batch after the last candidate pairs row should also be checked """
+    # Drop one of the steps of the last batch, the previous batches are still correct
+    last_step = max(num for num, row in enumerate(read_bwa.mem_pestat)
+                    if row.startswith('[M::mem_pestat] mean and std.dev:'))
+    del read_bwa.mem_pestat[last_step]
+
+    with pytest.raises(Exception, match='check_enough_pairs'):
+        read_bwa.check_mem_pestat()
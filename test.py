@@ -3,6 +3,7 @@ import os
 import sys
 import argparse
 import glob
+from concurrent.futures import ProcessPoolExecutor
 
 from qc.log_analysis_new import *
 from qc.applybqsr import ApplyBQSR
@@ -12,6 +13,111 @@ from qc.fastqc import Fastqc
 from qc.haplotype import HaploType
 from qc.samsort import SamSort
 
+def check_sample(center, study, sample, path_parent, samples, checks):
+    """
+    Run the selected checks on a single sample. The report is returned (as the arguments to print) instead of being
+    printed so that samples can be checked concurrently while keeping the output in order
+
+    :param center: Center the sample belongs to
+    :param study: Study the sample belongs to
+    :param sample: Folder of the sample
+    :param path_parent: Path to the folder of the sample
+    :param samples: Name of the sample (taken from the .gz files)
+    :param checks: List of checks to run
+    :return: List with the lines of the report
+    """
+    report = []
+
+    if 'bwa' in checks:
+        try:
+            bwa_class = Bwa(path=path_parent + 'bwa/', sample=samples, table_path=path_parent + 'bwa/')
+        except FileNotFoundError as e:
+            report.append(('BWA file not found',))
+        else:
+            try:
+                bwa_class.check_log()
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with Bwa: ', samples), (e,),
+                           ('===================',)]
+
+    if 'fastqc' in checks:
+        try:
+            fastqc_class = Fastqc(path=path_parent +'fastqc/', sample=samples)
+        except FileNotFoundError as e:
+            report.append(('FASTQC files not found',))
+        else:
+            try:
+                fastqc_class.check_log()
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with Fastqc: ', samples), (e,),
+                           ('===================',)]
+
+    if 'samsort' in checks:
+        try:
+            samsort_class = SamSort(path=path_parent+'bwa/', sample=samples, table_path='data/fastq.csv')
+        except FileNotFoundError as e:
+            report.append(('SAMSORTBLASTER file not found',))
+        else:
+            try:
+                samsort_class.check_log()
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with SamSort: ', samples), (e,),
+                           ('===================',)]
+
+    if 'baserecalibrator' in checks:
+        try:
+            baserecalibrator_class = BaseRecalibrator(path=path_parent + 'gatk_bsr/', sample=samples,
+                                                      table_path='data/fastq.csv')
+        except FileNotFoundError as e:
+            report.append(('GATK_BSR files not found',))
+        else:
+            try:
+                baserecalibrator_class.check_log(title=None, progressmeter_analysis=False, check_running=True, check_correct_sample=True, check_global_flags_start=True,
+                  check_final_section=True, check_global_flags=True, check_baserecalibrator=True, check_featuremanager=True,
+                  check_progressmeter=True)
+
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with BaseRecalibrator: ', samples), (e,),
+                           ('=================',)]
+
+    if 'applybqsr' in checks:
+        try:
+            applybqsr_class = ApplyBQSR(path=path_parent+'gatk_bsr/', sample=samples)
+        except FileNotFoundError as e:
+            report.append(('APPLYBQSR File not Found',))
+        else:
+            try:
+                applybqsr_class.check_log(title=None, check_running=True, check_correct_sample=False, check_global_flags_start=False,
+                  check_final_section=False, check_global_flags=False, check_applybqsr=False, check_featuremanager=False, check_progressmeter=False,
+                  progressmeter_analysis=True)
+
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with ApplyBQSR: ', samples), (e,),
+                           ('================',)]
+
+    if 'haplotype' in checks:
+        try:
+            haplo_class = HaploType(path=path_parent+'gatk_gvcf/', sample=samples)
+        except FileNotFoundError as e:
+            report.append(('HAPLOTYPE File not Found',))
+        else:
+            try:
+                haplo_class.check_log(warning_plot=False, title=None)
+
+            except Exception as e:
+                report += [(center + '/' + study + '/' + sample,), ('Issue with HaploType: ', sample), (e,),
+                           ('================',)]
+
+    return report
+
+
+def _check_task(task):
+    """
+    Aux function, unpack a task of the main loop into ``check_sample()``
+    """
+    return check_sample(*task)
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Quality Checks")
@@ -30,6 +136,7 @@ if __name__ == "__main__":
                'fb203f69-94b9-42aa-9f34-c9ee8219a22e', 
                'eaabd6f1-1b34-4196-882c-198465045d71']
 
+    tasks = []
     for center in centers:
         try:
             for study in os.listdir(path + '/' + center + '/'):
@@ -41,89 +148,13 @@ if __name__ == "__main__":
                     except IndexError as e:
                         print('Cannot find .gz files for this sample')
                         continue
-                    if 'bwa' in checks:
-                        bwa_class = Bwa(path=path_parent + 'bwa/', sample=samples, table_path=path_parent + 'bwa/')
-                        try:
-                            bwa_class.check_log()
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with Bwa: ', samples)
-                            print(e)
-                            print('===================')
-                    
-                    if 'fastqc' in checks:
-                        fastqc_class = Fastqc(path=path_parent +'fastqc/', sample=samples)
-                        try:
-                            fastqc_class.check_log()
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with Fastqc: ', samples)
-                            print(e)
-                            print('===================')
-
-                    if 'samsort' in checks:
-                        try:
-                            samsort_class = SamSort(path=path_parent+'bwa/', sample=samples, table_path='data/fastq.csv')
-                        except FileNotFoundError as e:
-                            print('SAMSORTBLASTER file not found')
-                        try:
-                            samsort_class.check_log()
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with SamSort: ', samples)
-                            print(e)
-                            print('===================')
-
-                    if 'baserecalibrator' in checks:
-                        try:
-                            baserecalibrator_class = BaseRecalibrator(path=path_parent + 'gatk_bsr/', sample=samples, 
-                                                                table_path='data/fastq.csv')
-                        except FileNotFoundError as e:
-                            print('GATK_BSR files not found')
-                        try:
-                            baserecalibrator_class.check_log(title=None, progressmeter_analysis=False, check_running=True, check_correct_sample=True, check_global_flags_start=True,
-                  check_final_section=True, check_global_flags=True, check_baserecalibrator=True, check_featuremanager=True,
-                  check_progressmeter=True)
-                                    
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with BaseRecalibrator: ', samples)
-                            print(e)
-                            print('=================')
-
-                    if 'applybqsr' in checks:
-                        try:
-                            applybqsr_class = ApplyBQSR(path=path_parent+'gatk_bsr/', sample=samples)
-                        except FileNotFoundError as e:
-                            print('APPLYBQSR File not Found')
-                        try:
-                            applybqsr_class.check_log(title=None, check_running=True, check_correct_sample=False, check_global_flags_start=False,
-                  check_final_section=False, check_global_flags=False, check_applybqsr=False, check_featuremanager=False, check_progressmeter=False,
-                  progressmeter_analysis=True)
-                                    
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with ApplyBQSR: ', samples)
-                            print(e)
-                            print('================')
-
-                    if 'haplotype' in checks:
-                        try:
-                            haplo_class = HaploType(path=path_parent+'gatk_gvcf/', sample=samples)
-                        except FileNotFoundError as e:
-                            print('HAPLOTYPE File not Found')
-                        try:
-                            haplo_class.check_log(warning_plot=False, title=None)
-                                    
-                        except Exception as e:
-                            print(center + '/' + study + '/' + sample)
-                            print('Issue with HaploType: ', sample)
-                            print(e)
-                            print('================')
-
-
-                    # break
+                    tasks.append((center, study, sample, path_parent, samples, checks))
         except PermissionError as e:
             print('No permissions for ', center)
             continue
 
+    # Samples are independent, check them in parallel (one process per core)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for report in executor.map(_check_task, tasks, chunksize=16):
+            for line in report:
+                print(*line)